@@ -8,14 +8,24 @@ Usage:
 Behavior:
 - Recursively copies files from source to destination.
 - If destination file does not exist -> copy (new).
-- If destination file exists and sizes differ -> overwrite (overwritten).
-- If destination file exists and sizes are identical -> skip (skipped).
+- If destination file exists and size or modification time differ -> overwrite (overwritten).
+- If destination file exists with identical size and modification time -> skip (skipped).
 - Produces a report file named YYYY-MM-DD_Report.txt (America/Chicago date).
 """
 
 import argparse
+import ctypes
+import ctypes.util
+import errno
+import functools
 import os
+import queue
 import shutil
+import stat
+import sys
+import threading
+import unicodedata
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 try:
     # Python 3.9+
@@ -23,8 +33,27 @@ try:
 except Exception:
     ZoneInfo = None
 
+# Directory walking is bound by syscall/disk latency rather than CPU, so many
+# more workers than cores keep the device queue busy.
+DEFAULT_THREADS = 32
+
+# Fallback read/write copies are done in chunks of this size.
+COPY_CHUNK_SIZE = 128 * 1024
+
+# Reports are written in one go; a large buffer keeps that a single write.
+REPORT_BUFFER_SIZE = 1 << 20
+
+# Maximum number of classified files waiting for a copy worker.
+COPY_QUEUE_SIZE = 1024
+
+_SEP = os.fsencode(os.sep)
+
+@functools.lru_cache(maxsize=1)
 def chicago_today_str():
-    """Return today's date string YYYY-MM-DD using America/Chicago where possible."""
+    """
+    Return today's date string YYYY-MM-DD using America/Chicago where possible.
+    Computed once per process, so every report of a run carries the same date.
+    """
     try:
         if ZoneInfo is not None:
             tz = ZoneInfo("America/Chicago")
@@ -36,18 +65,362 @@ def chicago_today_str():
         now = datetime.now()
     return now.strftime("%Y-%m-%d")
 
+# fallocate(2) mode, see <linux/falloc.h>
+FALLOC_FL_KEEP_SIZE = 0x01
+
+
+def _load_libc():
+    """Return a handle on the C library on Linux, or None."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+
+def _load_fallocate(libc):
+    """Return libc's fallocate64() wrapper, or None if it is not available."""
+    fn = getattr(libc, "fallocate64", None) if libc is not None else None
+    if fn is None:
+        return None
+    fn.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+    fn.restype = ctypes.c_int
+    return fn
+
+_libc = _load_libc()
+_fallocate = _load_fallocate(_libc)
+
+def _fast_stat(path):
+    """
+    Return (size, mtime) of path (not following symlinks), with mtime in
+    whole seconds: destinations such as FAT/exFAT, NTFS/SMB, HFS+ or small
+    ext4 inodes cannot keep nanoseconds, so finer comparisons would make
+    every unchanged file look modified.
+    """
+    st = os.stat(path, follow_symlinks=False)
+    return st.st_size, st.st_mtime_ns // 1_000_000_000
+
+# errno values meaning "this in-kernel copy is not possible here", e.g. a
+# cross-filesystem copy on an older kernel; the next method is tried instead.
+_COPY_FALLBACK_ERRNOS = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP}
+
+# One fixed read/write buffer per worker thread, reused for every copy, so the
+# memory held by in-flight copies is bounded by the pool size.
+_copy_buffers = threading.local()
+
+_HAVE_FADVISE = hasattr(os, "posix_fadvise")
+
+def _copy_buffer():
+    buf = getattr(_copy_buffers, "buf", None)
+    if buf is None:
+        buf = _copy_buffers.buf = bytearray(COPY_CHUNK_SIZE)
+    return buf
+
+def _copy_fd(src_fd, dst_fd, size):
+    """
+    Copy from src_fd to dst_fd starting at their current offsets.
+    Tries copy_file_range (in-kernel, reflinks where supported), then
+    sendfile, then a plain read/write loop (see _copy_fd_bytes). Each method
+    picks up where the previous one stopped because they all advance the
+    file offsets.
+    """
+    remaining = size
+    if hasattr(os, "copy_file_range"):
+        try:
+            while remaining > 0:
+                n = os.copy_file_range(src_fd, dst_fd, remaining)
+                if n == 0:
+                    break
+                remaining -= n
+        except OSError as e:
+            if e.errno not in _COPY_FALLBACK_ERRNOS:
+                raise
+        if remaining <= 0:
+            return
+
+    # Only the byte-moving fallbacks need new blocks (copy_file_range may
+    # reflink without any), and files that fit in one chunk gain nothing.
+    if remaining > COPY_CHUNK_SIZE and _preallocate(dst_fd, size - remaining, remaining):
+        try:
+            _copy_fd_bytes(src_fd, dst_fd, remaining)
+        finally:
+            # Blocks reserved past EOF stay allocated until truncated, e.g.
+            # when the source shrank mid-copy; cut back to what was written.
+            os.ftruncate(dst_fd, os.lseek(dst_fd, 0, os.SEEK_CUR))
+    else:
+        _copy_fd_bytes(src_fd, dst_fd, remaining)
+
+def _copy_fd_bytes(src_fd, dst_fd, remaining):
+    """
+    Copy the rest of src_fd to dst_fd by moving the bytes: sendfile, then a
+    plain read/write loop.
+    """
+    # sendfile() to a regular file is only supported on Linux
+    if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+        try:
+            while remaining > 0:
+                n = os.sendfile(dst_fd, src_fd, None, remaining)
+                if n == 0:
+                    break
+                remaining -= n
+        except OSError as e:
+            if e.errno not in _COPY_FALLBACK_ERRNOS:
+                raise
+        if remaining <= 0:
+            return
+
+    buf = _copy_buffer()
+    readv = getattr(os, "readv", None)
+    while True:
+        if readv is not None:
+            n = readv(src_fd, [buf])
+            view = memoryview(buf)[:n]
+        else:
+            view = memoryview(os.read(src_fd, COPY_CHUNK_SIZE))
+        if not view:
+            break
+        while view:
+            view = view[os.write(dst_fd, view):]
+
+def _fadvise(fd, advice):
+    """Pass an os.POSIX_FADV_* access-pattern hint for the whole file to the kernel."""
+    try:
+        os.posix_fadvise(fd, 0, 0, advice)
+    except OSError:
+        # only a hint; some filesystems reject it
+        pass
+
+def _preallocate(fd, offset, length):
+    """
+    Reserve length bytes of fd from offset up front so the filesystem can
+    allocate the extent in one go. Returns True if blocks were reserved.
+    Uses fallocate(2) directly: glibc's posix_fallocate would emulate it by
+    writing every block on filesystems without support.
+    """
+    if _fallocate is None or length <= 0:
+        return False
+    # KEEP_SIZE: reserve blocks without extending the visible file size
+    if _fallocate(fd, FALLOC_FL_KEEP_SIZE, offset, length) != 0:
+        err = ctypes.get_errno()
+        if err == errno.ENOSPC:
+            raise OSError(err, os.strerror(err))
+        # EOPNOTSUPP and friends: preallocation is only an optimisation
+        return False
+    return True
+
+def _fast_copy(src_path, dst_path):
+    """
+    Copy a regular file's contents and metadata (like shutil.copy2).
+    The data is moved inside the kernel where possible. The byte count comes
+    from fstat on the already-open source, so it matches what is copied even
+    if the file changed since it was classified.
+    Raises shutil.SameFileError, as copy2 does, if dst_path resolves to the
+    source (a symlink or hard link to it), before anything is truncated.
+    """
+    binary = getattr(os, "O_BINARY", 0)
+    src_fd = os.open(src_path, os.O_RDONLY | binary)
+    try:
+        src_st = os.fstat(src_fd)
+        src_size = src_st.st_size
+        # The destination is opened with O_TRUNC, which follows symlinks
+        try:
+            dst_st = os.stat(dst_path)
+        except FileNotFoundError:
+            pass
+        else:
+            if (dst_st.st_dev, dst_st.st_ino) == (src_st.st_dev, src_st.st_ino):
+                raise shutil.SameFileError(
+                    f"{os.fsdecode(src_path)!r} and {os.fsdecode(dst_path)!r} are the same file")
+        # Access hints cost a syscall each, so only files spanning more than
+        # one copy chunk get them
+        hint = _HAVE_FADVISE and src_size > COPY_CHUNK_SIZE
+        if hint:
+            # Widen read-ahead on the source
+            _fadvise(src_fd, os.POSIX_FADV_SEQUENTIAL)
+        dst_fd = os.open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | binary, 0o666)
+        try:
+            _copy_fd(src_fd, dst_fd, src_size)
+            if hint:
+                # A sync reads each file once; drop its clean source pages
+                _fadvise(src_fd, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    shutil.copystat(src_path, dst_path)
+
+def _copy_entry(entry, dst_path):
+    """
+    Copy one scandir entry. Regular files take the direct path; symlinks
+    (recreated as links) and special files are left to shutil.copy2.
+    """
+    if entry.is_file(follow_symlinks=False):
+        _fast_copy(entry.path, dst_path)
+    else:
+        shutil.copy2(entry.path, dst_path, follow_symlinks=False)
+
+def _fold_name(name):
+    """Return a bytes file name in NFC, casefolded, for loose name matching."""
+    return unicodedata.normalize("NFC", os.fsdecode(name)).casefold()
+
+def _error_message(rel, exc):
+    """
+    Format a report line "rel -> error" from a bytes relative path.
+    OSErrors raised on bytes paths carry bytes filenames; they are decoded
+    so the line reads "[Errno 13] Permission denied: '/path'" as with str paths.
+    """
+    if isinstance(exc, OSError) and exc.errno is not None and exc.filename is not None:
+        detail = f"[Errno {exc.errno}] {exc.strerror}: {os.fsdecode(exc.filename)!r}"
+        if exc.filename2 is not None:
+            detail += f" -> {os.fsdecode(exc.filename2)!r}"
+    else:
+        detail = str(exc)
+    return f"{os.fsdecode(rel)} -> {detail}"
+
 def ensure_parent_dir(path):
     parent = os.path.dirname(path)
-    if parent and not os.path.exists(parent):
+    if parent:
         os.makedirs(parent, exist_ok=True)
 
-def sync_copy(src, dst):
+def _scan_dir(dst, root, rel_dir, copy_queue):
+    """
+    Classify the files directly inside one source directory.
+    Files that need copying are put on copy_queue as
+    (entry, dst_path, rel, "new" | "overwritten") jobs for the copy workers.
+    Returns (results, subdirs) where results holds this directory's
+    skipped/errors lists and subdirs the (src_dir, rel_dir) pairs still to
+    be visited. All paths are bytes.
+    """
+    results = {
+        "skipped": [],
+        "errors": []
+    }
+    subdirs = []
+
+    dst_dir = os.path.join(dst, rel_dir) if rel_dir else dst
+    try:
+        # ensure destination directory exists; the parent is always in place
+        # already (sync_copy creates dst, and subdirectories are only queued
+        # once their parent's task has run), so a single mkdir is enough
+        try:
+            os.mkdir(dst_dir)
+            created = True
+        except FileExistsError:
+            created = False
+        with os.scandir(root) as it:
+            entries = list(it)
+    except OSError as e:
+        results["errors"].append(_error_message(rel_dir or b".", e))
+        return results, subdirs
+
+    # List the destination directory once instead of probing every
+    # destination path: names missing from the listing are new files
+    # without any per-file syscall. A directory we just created is empty.
+    # If the listing fails, dst_entries is None and every file is probed.
+    # dst_folded catches names that only differ in case or Unicode
+    # normalization, which are the same file on case- or
+    # normalization-insensitive filesystems (NTFS, APFS, HFS+); those are
+    # probed as well.
+    dst_entries = set()
+    dst_folded = set()
+    if not created:
+        try:
+            with os.scandir(dst_dir) as it:
+                dst_entries = {e.name for e in it}
+            dst_folded = {_fold_name(n) for n in dst_entries}
+        except OSError:
+            dst_entries = None
+
+    # Paths are built by plain concatenation from per-directory prefixes;
+    # os.path.join/relpath per file are measurable once the cache is hot.
+    dst_prefix = dst_dir + _SEP
+    rel_prefix = rel_dir + _SEP if rel_dir else b""
+
+    # Bind the per-file callables to locals once: inside the loop they are
+    # then fast local loads instead of dict and global lookups.
+    skipped_append = results["skipped"].append
+    fast_stat = _fast_stat
+    put = copy_queue.put
+
+    for entry in entries:
+        name = entry.name
+        if entry.is_dir(follow_symlinks=False):
+            subdirs.append((entry.path, rel_prefix + name))
+            continue
+        if entry.is_symlink() and entry.is_dir():
+            # os.walk never descended into directory symlinks either
+            continue
+
+        src_path = entry.path
+        dst_path = dst_prefix + name
+        rel = rel_prefix + name
+
+        try:
+            # (size, mtime in whole seconds) fingerprints
+            try:
+                src_sig = fast_stat(src_path)
+            except OSError:
+                src_sig = None
+            dst_exists = (dst_entries is None or name in dst_entries
+                          or (dst_folded and _fold_name(name) in dst_folded))
+            dst_sig = None
+            if dst_exists:
+                try:
+                    dst_sig = fast_stat(dst_path)
+                except FileNotFoundError:
+                    # removed since the directory was listed
+                    dst_exists = False
+                except OSError:
+                    pass
+
+            if not dst_exists:
+                # ensure parent exists (already created above)
+                put((entry, dst_path, rel, "new"))
+            elif src_sig is None or dst_sig is None or src_sig != dst_sig:
+                # if metadata is unavailable (rare), treat as different and overwrite
+                put((entry, dst_path, rel, "overwritten"))
+            else:
+                # same size and mtime -> skip
+                skipped_append(rel)
+        except Exception as e:
+            results["errors"].append(_error_message(rel, e))
+
+    return results, subdirs
+
+def _copy_worker(copy_queue):
+    """
+    Run copy jobs from copy_queue until a None sentinel arrives.
+    Returns this worker's new/overwritten/errors lists.
+    """
+    results = {
+        "new": [],
+        "overwritten": [],
+        "errors": []
+    }
+    copy_entry = _copy_entry
+    while True:
+        job = copy_queue.get()
+        if job is None:
+            return results
+        entry, dst_path, rel, key = job
+        try:
+            copy_entry(entry, dst_path)
+            results[key].append(rel)
+        except Exception as e:
+            results["errors"].append(_error_message(rel, e))
+
+def sync_copy(src, dst, threads=DEFAULT_THREADS):
     """
     Copy files from src -> dst with logic:
       - new files: file doesn't exist in dst -> copy
-      - overwritten: file exists in dst but size differs -> copy (overwrite)
-      - skipped: file exists in dst and size equal -> skip
+      - overwritten: file exists in dst but size or mtime differs -> copy (overwrite)
+      - skipped: file exists in dst with equal size and mtime -> skip
+    Runs as a two-stage pipeline: a pool of `threads` workers scans and
+    classifies directories, feeding a bounded queue that a second pool of
+    `threads` workers drains by copying, so a slow copy never holds up
+    discovery of the rest of the tree.
     Returns dict with lists: new, overwritten, skipped, errors
+    (new/overwritten/skipped hold relative paths as bytes; use os.fsdecode)
     """
     results = {
         "new": [],
@@ -56,59 +429,49 @@ def sync_copy(src, dst):
         "errors": []
     }
 
-    src = os.path.abspath(src)
-    dst = os.path.abspath(dst)
+    # Work on bytes paths throughout: scandir then yields bytes names and no
+    # path is decoded/re-encoded per file. Only error messages are decoded.
+    src = os.fsencode(os.path.abspath(src))
+    dst = os.fsencode(os.path.abspath(dst))
 
-    if not os.path.exists(src):
-        raise FileNotFoundError(f"Source not found: {src}")
-    if not os.path.isdir(src):
-        raise NotADirectoryError(f"Source is not a directory: {src}")
+    # One stat answers both "does it exist" and "is it a directory"
+    try:
+        src_mode = os.stat(src).st_mode
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Source not found: {os.fsdecode(src)}")
+    if not stat.S_ISDIR(src_mode):
+        raise NotADirectoryError(f"Source is not a directory: {os.fsdecode(src)}")
 
-    # Walk through source directory
-    for root, dirs, files in os.walk(src, followlinks=False):
-        # Compute corresponding destination directory
-        rel_dir = os.path.relpath(root, src)
-        if rel_dir == ".":
-            rel_dir = ""
-        dst_dir = os.path.join(dst, rel_dir)
-        # ensure destination directory exists
-        os.makedirs(dst_dir, exist_ok=True)
+    os.makedirs(dst, exist_ok=True)
 
-        for fname in files:
-            src_path = os.path.join(root, fname)
-            dst_path = os.path.join(dst_dir, fname)
+    threads = max(1, threads)
+    # Bounded so scanning can only run so far ahead of the copies
+    copy_queue = queue.Queue(maxsize=COPY_QUEUE_SIZE)
 
-            try:
-                # If dst file doesn't exist -> new copy
-                if not os.path.exists(dst_path):
-                    # ensure parent exists (already created per dir loop)
-                    shutil.copy2(src_path, dst_path, follow_symlinks=False)
-                    results["new"].append(os.path.relpath(dst_path, dst))
-                    continue
-
-                # both files exist -> compare sizes
-                try:
-                    src_size = os.path.getsize(src_path)
-                except OSError:
-                    src_size = None
-                try:
-                    dst_size = os.path.getsize(dst_path)
-                except OSError:
-                    dst_size = None
-
-                if src_size is None or dst_size is None:
-                    # fallback: use byte-by-byte check if sizes unavailable (rare)
-                    # but for safety, treat as different and overwrite
-                    shutil.copy2(src_path, dst_path, follow_symlinks=false)
-                    results["overwritten"].append(os.path.relpath(dst_path, dst))
-                elif src_size != dst_size:
-                    shutil.copy2(src_path, dst_path, follow_symlinks=false)
-                    results["overwritten"].append(os.path.relpath(dst_path, dst))
-                else:
-                    # same size -> skip
-                    results["skipped"].append(os.path.relpath(dst_path, dst))
-            except Exception as e:
-                results["errors"].append(f"{os.path.relpath(src_path, src)} -> {e}")
+    with ThreadPoolExecutor(max_workers=threads) as copy_pool:
+        copiers = [copy_pool.submit(_copy_worker, copy_queue) for _ in range(threads)]
+        try:
+            # Each directory is one scan task; finished tasks hand back their
+            # subdirectories to be submitted in turn. Per-task results are
+            # merged here, on the calling thread, so workers never share a list.
+            with ThreadPoolExecutor(max_workers=threads) as scan_pool:
+                pending = {scan_pool.submit(_scan_dir, dst, src, b"", copy_queue)}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        dir_results, subdirs = future.result()
+                        for key, items in dir_results.items():
+                            results[key].extend(items)
+                        for root, rel_dir in subdirs:
+                            pending.add(scan_pool.submit(_scan_dir, dst, root, rel_dir, copy_queue))
+        finally:
+            # one sentinel per copier once every job has been queued
+            for _ in copiers:
+                copy_queue.put(None)
+
+        for future in copiers:
+            for key, items in future.result().items():
+                results[key].extend(items)
 
     return results
 
@@ -119,16 +482,22 @@ def write_error_report(error_message, report_directory, file_name):
     os.makedirs(report_directory, exist_ok=True)
     report_path = os.path.join(report_directory, report_name)
 
-    with open(report_path, "w", encoding="utf-8") as f:
-        f.write(f"Report date (America/Chicago): {date_str}\n")
-        f.write("Summary:\n")
-        f.write("  New files:         0\n")
-        f.write("  Overwritten files: 0\n")
-        f.write("  Skipped files:     0\n")
-        f.write("  Errors:            1\n\n")
-        f.write("Errors:\n")
-        f.write(f"  {error_message}\n\n")
-        f.write("End of report\n")
+    lines = [
+        f"Report date (America/Chicago): {date_str}",
+        "Summary:",
+        "  New files:         0",
+        "  Overwritten files: 0",
+        "  Skipped files:     0",
+        "  Errors:            1",
+        "",
+        "Errors:",
+        f"  {error_message}",
+        "",
+        "End of report",
+    ]
+
+    with open(report_path, "w", encoding="utf-8", buffering=REPORT_BUFFER_SIZE) as f:
+        f.write("\n".join(lines) + "\n")
 
     return report_path
 
@@ -143,35 +512,44 @@ def write_report(results, report_directory, file_name):
     skipped_count = len(results.get("skipped", []))
     errors = results.get("errors", [])
 
-    with open(report_path, "w", encoding="utf-8") as f:
-        f.write(f"Report date (America/Chicago): {date_str}\n")
-        f.write("Summary:\n")
-        f.write(f"  New files:         {new_count}\n")
-        f.write(f"  Overwritten files: {overwritten_count}\n")
-        f.write(f"  Skipped files:     {skipped_count}\n")
-        f.write(f"  Errors:            {len(errors)}\n")
-        f.write("\n")
-
-        # Optionally include lists (first 200 entries each to avoid massive files)
-        max_list_items = 200
-
-        if errors:
-            f.write("Errors:\n")
-            for e in errors:
-                f.write(f"  {e}\n")
-            f.write("\n")
-
-        f.write("End of report\n")
+    # Build the whole report and hand it to the file in one write
+    lines = [
+        f"Report date (America/Chicago): {date_str}",
+        "Summary:",
+        f"  New files:         {new_count}",
+        f"  Overwritten files: {overwritten_count}",
+        f"  Skipped files:     {skipped_count}",
+        f"  Errors:            {len(errors)}",
+        "",
+    ]
+
+    # Optionally include lists (first 200 entries each to avoid massive files)
+    max_list_items = 200
+
+    if errors:
+        lines.append("Errors:")
+        lines.extend(f"  {e}" for e in errors)
+        lines.append("")
+
+    lines.append("End of report")
+
+    # Paths decoded with os.fsdecode may carry surrogate escapes for bytes
+    # that are not valid UTF-8; write those bytes back out unchanged.
+    with open(report_path, "w", encoding="utf-8", errors="surrogateescape",
+              buffering=REPORT_BUFFER_SIZE) as f:
+        f.write("\n".join(lines) + "\n")
 
     return report_path
 
 def parse_args():
-    p = argparse.ArgumentParser(description="Sync copy with size-based overwrite and report")
+    p = argparse.ArgumentParser(description="Sync copy with size/mtime-based overwrite and report")
     p.add_argument("src", help="Source directory to copy from")
     p.add_argument("dst", help="Destination directory to copy to")
     p.add_argument("--report-dir", "-r", default=None,
                    help="Directory where report file will be written. Defaults to destination directory.")
     p.add_argument("--file_name", "-f", default="example", help="file name for the report file.  Defaults to example")
+    p.add_argument("--threads", "-t", type=int, default=DEFAULT_THREADS,
+                   help=f"Worker threads for scanning and for copying (each). Defaults to {DEFAULT_THREADS}")
     return p.parse_args()
 
 def main():
@@ -180,12 +558,15 @@ def main():
     dst = args.dst
     report_dir = args.report_dir or dst
     file_name = args.file_name
+    threads = args.threads
 
     try:
         # Validate source first
-        if not os.path.exists(src):
+        try:
+            src_mode = os.stat(src).st_mode
+        except FileNotFoundError:
             raise FileNotFoundError(f"Source directory does not exist: {os.path.abspath(src)}")
-        if not os.path.isdir(src):
+        if not stat.S_ISDIR(src_mode):
             raise NotADirectoryError(f"Source is not a directory: {os.path.abspath(src)}")
 
         # Ensure destination exists or can be created
@@ -197,7 +578,7 @@ def main():
         print(f"Copying from: {src}")
         print(f"Copying to:   {dst}")
 
-        results = sync_copy(src, dst)
+        results = sync_copy(src, dst, threads)
         report_path = write_report(results, report_dir, file_name)
 
         print("\nDone.")
@@ -0,0 +1,197 @@
+import errno
+import os
+from unittest import mock
+
+import pytest
+
+import file_sync
+
+
+def make_tree(tmp_path, src_text, dst_text):
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    src.mkdir()
+    dst.mkdir()
+    (src / "a.txt").write_text(src_text)
+    (dst / "a.txt").write_text(dst_text)
+    return src, dst
+
+
+def test_overwrites_when_size_lookup_fails(tmp_path):
+    # same size, so only the failed lookup can force the copy
+    src, dst = make_tree(tmp_path, "hello", "HELLO")
+
+    with mock.patch("file_sync._fast_stat", side_effect=PermissionError):
+        results = file_sync.sync_copy(src, dst)
+
+    assert results["overwritten"] == [b"a.txt"]
+    assert results["errors"] == []
+    assert (dst / "a.txt").read_text() == "hello"
+
+
+def test_overwrites_when_size_differs(tmp_path):
+    src, dst = make_tree(tmp_path, "hello world", "hi")
+
+    results = file_sync.sync_copy(src, dst)
+
+    assert results["overwritten"] == [b"a.txt"]
+    assert results["new"] == []
+    assert results["skipped"] == []
+    assert (dst / "a.txt").read_text() == "hello world"
+    assert os.stat(dst / "a.txt").st_mtime_ns == os.stat(src / "a.txt").st_mtime_ns
+
+
+def test_unlistable_destination_falls_back_to_stat(tmp_path):
+    src, dst = make_tree(tmp_path, "same", "same")
+    os.utime(dst / "a.txt", ns=(0, os.stat(src / "a.txt").st_mtime_ns))
+    real_scandir = os.scandir
+
+    def scandir(path):
+        if os.fsdecode(path) == str(dst):
+            raise PermissionError(13, "Permission denied", path)
+        return real_scandir(path)
+
+    with mock.patch("os.scandir", side_effect=scandir):
+        results = file_sync.sync_copy(src, dst)
+
+    assert results["skipped"] == [b"a.txt"]
+    assert results["new"] == []
+
+
+def test_destination_symlink_to_source_is_not_truncated(tmp_path):
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    src.mkdir()
+    dst.mkdir()
+    (src / "a.txt").write_text("hello world\n")
+    os.symlink(src / "a.txt", dst / "a.txt")
+
+    results = file_sync.sync_copy(src, dst)
+
+    assert (src / "a.txt").read_text() == "hello world\n"
+    assert results["overwritten"] == []
+    assert len(results["errors"]) == 1
+    assert "are the same file" in results["errors"][0]
+
+
+def test_error_messages_show_decoded_paths(tmp_path):
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    src.mkdir()
+    dst.mkdir()
+    (src / "dé").write_text("x")
+    # a directory in the way makes the copy fail on the destination path
+    (dst / "dé").mkdir()
+
+    results = file_sync.sync_copy(src, dst)
+
+    assert results["errors"] == [
+        f"dé -> [Errno {errno.EISDIR}] {os.strerror(errno.EISDIR)}: {str(dst / 'dé')!r}"
+    ]
+
+
+def test_same_size_with_different_mtime_is_overwritten(tmp_path):
+    src, dst = make_tree(tmp_path, "hello", "HELLO")
+    os.utime(dst / "a.txt", (1_000_000_000, 1_000_000_000))
+
+    results = file_sync.sync_copy(src, dst)
+
+    assert results["overwritten"] == [b"a.txt"]
+    assert (dst / "a.txt").read_text() == "hello"
+
+
+def test_rerun_after_copy_skips_everything(tmp_path):
+    src, dst = make_tree(tmp_path, "hello world", "hi")
+    (src / "b.txt").write_text("new")
+
+    first = file_sync.sync_copy(src, dst)
+    second = file_sync.sync_copy(src, dst)
+
+    assert sorted(first["new"] + first["overwritten"]) == [b"a.txt", b"b.txt"]
+    assert sorted(second["skipped"]) == [b"a.txt", b"b.txt"]
+    assert second["new"] == second["overwritten"] == second["errors"] == []
+
+
+def test_sub_second_mtime_difference_is_skipped(tmp_path):
+    src, dst = make_tree(tmp_path, "same", "same")
+    os.utime(src / "a.txt", ns=(0, 1_000_000_000_123_456_789))
+    # as stored by a destination with coarser timestamps
+    os.utime(dst / "a.txt", ns=(0, 1_000_000_000_000_000_000))
+
+    results = file_sync.sync_copy(src, dst)
+
+    assert results["skipped"] == [b"a.txt"]
+
+
+@pytest.mark.parametrize("threads", [1, 4])
+def test_nested_tree_is_copied_and_rerun_skips(tmp_path, threads):
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    expected = set()
+    # three levels deep, 35 files: far more jobs than copy workers
+    for a in range(2):
+        for b in range(2):
+            leaf = src / f"a{a}" / f"b{b}" / "c"
+            leaf.mkdir(parents=True)
+            for i in range(8):
+                (leaf / f"f{i}.txt").write_text("x" * i)
+                expected.add(f"a{a}/b{b}/c/f{i}.txt")
+        (src / f"a{a}" / "top.txt").write_text("top")
+        expected.add(f"a{a}/top.txt")
+    (src / "root.txt").write_text("root")
+    expected.add("root.txt")
+
+    first = file_sync.sync_copy(src, dst, threads=threads)
+
+    assert {os.fsdecode(p) for p in first["new"]} == expected
+    assert len(first["new"]) == len(expected)
+    assert first["overwritten"] == first["skipped"] == first["errors"] == []
+    for rel in expected:
+        assert (dst / rel).read_text() == (src / rel).read_text()
+
+    second = file_sync.sync_copy(src, dst, threads=threads)
+
+    assert {os.fsdecode(p) for p in second["skipped"]} == expected
+    assert second["new"] == second["overwritten"] == second["errors"] == []
+
+
+def test_differently_normalized_destination_name_is_probed(tmp_path):
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    src.mkdir()
+    dst.mkdir()
+    nfc = "caf\u00e9.txt"
+    nfd = "cafe\u0301.txt"
+    (src / nfc).write_text("x")
+    (dst / nfd).write_text("x")
+    probed = []
+    real_fast_stat = file_sync._fast_stat
+
+    def fast_stat(path):
+        probed.append(os.fsdecode(path))
+        return real_fast_stat(path)
+
+    with mock.patch("file_sync._fast_stat", side_effect=fast_stat):
+        file_sync.sync_copy(src, dst)
+
+    # on a normalization-insensitive filesystem this probe finds the file
+    assert str(dst / nfc) in probed
+
+
+@pytest.mark.skipif(file_sync._fallocate is None, reason="needs fallocate(2)")
+def test_preallocated_blocks_are_released_when_source_shrinks(tmp_path, monkeypatch):
+    monkeypatch.delattr(os, "copy_file_range", raising=False)
+    data = os.urandom(200 * 1024)
+    (tmp_path / "src").write_bytes(data)
+    src_fd = os.open(tmp_path / "src", os.O_RDONLY)
+    dst_fd = os.open(tmp_path / "dst", os.O_WRONLY | os.O_CREAT | os.O_TRUNC)
+    try:
+        # classified at 16 MiB, only 200 KiB left by the time it is copied
+        file_sync._copy_fd(src_fd, dst_fd, 16 * 1024 * 1024)
+        st = os.fstat(dst_fd)
+    finally:
+        os.close(src_fd)
+        os.close(dst_fd)
+
+    assert (tmp_path / "dst").read_bytes() == data
+    assert st.st_blocks * 512 < 1024 * 1024